@@ -8,9 +8,14 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_ROOT="$(dirname "$(dirname "$SCRIPT_DIR")")"
 WHISPER_PATH="$HOME/workspace/whisper.cpp"
 WHISPER_BIN="$WHISPER_PATH/build/bin/whisper-cli"
-MODEL_PATH="$PROJECT_ROOT/data/models/ggml-base.en.bin"
+MODEL_PATH="$PROJECT_ROOT/data/models/ggml-base.en-q5_1.bin"
+[ -f "$MODEL_PATH" ] || MODEL_PATH="$PROJECT_ROOT/data/models/ggml-base.en.bin"
+WHISPER_THREADS=$(( $(nproc) > 1 ? $(nproc) - 1 : 1 ))  # all cores but one
 RECORDINGS_DIR="$PROJECT_ROOT/data/recordings"
-TEMP_AUDIO="$RECORDINGS_DIR/temp_recording.wav"
+# Keep the short-lived clip in RAM (tmpfs) when available
+TMPFS_DIR="/dev/shm"
+[ -d "$TMPFS_DIR" ] || TMPFS_DIR="$RECORDINGS_DIR"
+TEMP_AUDIO="$TMPFS_DIR/voice_dictation_$$.wav"
 
 # Colors for output
 RED='\033[0;31m'
@@ -95,7 +100,7 @@ transcribe_audio() {
         --print-special false \
         --print-progress false \
         -l en \
-        -t 4 \
+        -t "$WHISPER_THREADS" \
         2>/dev/null | tail -n 1 | sed 's/\x1b\[[0-9;]*m//g; s/<|endoftext|>//g; s/^[[:space:]]*//; s/[[:space:]]*$//')
     
     if [ -z "$OUTPUT" ]; then
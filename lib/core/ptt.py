@@ -2,6 +2,7 @@
 """
 Push-to-Talk Voice Dictation Daemon
 Hold Right Alt (AltGr) to record, release to transcribe
+Set PTT_KEY to use another key or a chord, e.g. PTT_KEY=LEFTALT+SLASH
 Works on Wayland/GNOME using evdev
 
 Preferred: Add user to input group to run without sudo
@@ -9,24 +10,40 @@ Alternative: Run with sudo (may have audio issues)
 """
 
 import os
+import re
 import sys
 import time
 import signal
+import selectors
 import subprocess
+import shutil
+import socket
+import http.client
+import json
+import hashlib
+import sqlite3
 import threading
-import tempfile
+import struct
+import math
+import array
 import grp
 from pathlib import Path
 from typing import Optional
 
 try:
     import evdev
-    from evdev import InputDevice, categorize, ecodes
+    from evdev import InputDevice, ecodes
 except ImportError:
     print("Error: python3-evdev not installed")
     print("Install with: pip install evdev")
     sys.exit(1)
 
+try:
+    import numpy as np
+except ImportError:
+    # Optional: only speeds up the silence check
+    np = None
+
 # Configuration
 # Get user home directory (works for both sudo and regular user)
 import pwd
@@ -41,21 +58,151 @@ else:
     USER_HOME = str(Path.home())
 
 WHISPER_BIN = Path(USER_HOME) / "workspace/whisper.cpp/build/bin/whisper-cli"
-MODEL_PATH = Path(USER_HOME) / "workspace/voice-dictation/data/models/ggml-base.en.bin"
+MODELS_DIR = Path(USER_HOME) / "workspace/voice-dictation/data/models"
+# Prefer the 5-bit quantized model (less weight bandwidth per matmul), fall back to FP16
+QUANTIZED_MODEL_PATH = MODELS_DIR / "ggml-base.en-q5_1.bin"
+MODEL_PATH = QUANTIZED_MODEL_PATH if QUANTIZED_MODEL_PATH.exists() else MODELS_DIR / "ggml-base.en.bin"
 RECORDINGS_DIR = Path(USER_HOME) / "workspace/voice-dictation/data/recordings"
+# Under sudo, XDG_CACHE_HOME (if kept) would be root's, so use the user's default
+if os.geteuid() != 0 and os.environ.get('XDG_CACHE_HOME'):
+    CACHE_HOME = Path(os.environ['XDG_CACHE_HOME'])
+else:
+    CACHE_HOME = Path(USER_HOME) / ".cache"
+KEYBOARD_CACHE_PATH = CACHE_HOME / "voice-dictation/device"
+
+# Persistent whisper.cpp server (falls back to whisper-cli if unavailable)
+WHISPER_SERVER_BIN = WHISPER_BIN.parent / "whisper-server"
+WHISPER_SERVER_HOST = '127.0.0.1'
+WHISPER_SERVER_STARTUP_TIMEOUT = 30  # seconds to wait for the model to load
+
+def parse_cpu_list(text: str) -> set:
+    """Parse a sysfs CPU list such as '0-7,12' into a set of CPU ids"""
+    cpus = set()
+    for part in text.strip().split(','):
+        if part:
+            first, _, last = part.partition('-')
+            cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
 
-# Key configuration - Just Right Alt (AltGr)
-RECORD_KEY = ecodes.KEY_RIGHTALT  # Hold to record, release to transcribe
+def performance_cpus() -> set:
+    """CPUs this process may use, minus E-cores on Intel hybrid CPUs"""
+    available = os.sched_getaffinity(0)
+    try:
+        # Only exists on hybrid parts; lists the P-cores (E-cores are in cpu_atom)
+        p_cores = parse_cpu_list(Path('/sys/devices/cpu_core/cpus').read_text())
+    except (OSError, ValueError):
+        return available
+    return (p_cores & available) or available
+
+# Pin the event loop to one P-core and give whisper the remaining P-cores
+PERFORMANCE_CPUS = performance_cpus()
+EVENT_LOOP_CPU = min(PERFORMANCE_CPUS)
+WHISPER_CPUS = (PERFORMANCE_CPUS - {EVENT_LOOP_CPU}) or PERFORMANCE_CPUS
+WHISPER_THREADS = len(WHISPER_CPUS)
+WHISPER_ENV = {
+    **os.environ,
+    'OMP_NUM_THREADS': str(WHISPER_THREADS),
+    'GGML_NTHREADS': str(WHISPER_THREADS)
+}
+
+# Transcriptions of previously seen clips, keyed by a hash of the raw PCM.
+# Opt-in (PTT_CACHE=1): only byte-identical clips hit, and it stores dictated text
+TRANSCRIPTION_CACHE_ENABLED = os.environ.get('PTT_CACHE') == '1'
+TRANSCRIPTION_CACHE_PATH = RECORDINGS_DIR / "tx_cache.db"
+TRANSCRIPTION_CACHE_SIZE = 500  # entries kept before evicting least recently used
+
+# Whisper consumes 16kHz mono 16-bit PCM, so record in that format directly
+SAMPLE_RATE = 16000
+READ_CHUNK_SIZE = 4096  # bytes per recorder pipe read (~128ms of audio)
+RECORDER_STOP_TIMEOUT = 0.1  # seconds to wait for a recorder to exit before killing it
+
+# s16 RMS below which a clip counts as silence; lower it (or 0 to disable) for quiet mics
+try:
+    SILENCE_RMS_THRESHOLD = float(os.environ.get('PTT_SILENCE_RMS', '200'))
+except ValueError:
+    print(f"Error: PTT_SILENCE_RMS must be a number, got '{os.environ['PTT_SILENCE_RMS']}'")
+    sys.exit(1)
+
+# ANSI escape sequences (colors, cursor control) in whisper output
+ANSI_ESCAPE_RE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+def parse_key_spec(spec: str) -> list:
+    """Parse a key spec like 'RIGHTALT' or 'LEFTALT+SLASH' into evdev key codes"""
+    codes = []
+    for name in spec.upper().split('+'):
+        name = name.strip()
+        code = ecodes.ecodes.get(name if name.startswith('KEY_') else f'KEY_{name}')
+        if code is None:
+            print(f"Error: Unknown key '{name}' in PTT_KEY={spec}")
+            print("Use evdev key names without the KEY_ prefix, e.g. RIGHTALT or LEFTALT+SLASH")
+            sys.exit(1)
+        codes.append(code)
+    return codes
+
+# Key configuration - Right Alt (AltGr) unless overridden with PTT_KEY.
+# For chords, every key but the last is a modifier that must already be held
+PTT_KEY = os.environ.get('PTT_KEY', 'RIGHTALT')
+*MODIFIER_KEYS, RECORD_KEY = parse_key_spec(PTT_KEY)  # Hold to record, release to transcribe
+RECORD_KEY_LABEL = 'Right Alt (AltGr)' if PTT_KEY.upper() == 'RIGHTALT' else PTT_KEY.upper()
+
+def wav_header(data_size: int) -> bytes:
+    """44-byte RIFF/WAVE header for data_size bytes of 16kHz mono s16le PCM"""
+    return struct.pack(
+        '<4sI4s4sIHHIIHH4sI',
+        b'RIFF', 36 + data_size, b'WAVE',
+        b'fmt ', 16, 1, 1, SAMPLE_RATE, SAMPLE_RATE * 2, 2, 16,
+        b'data', data_size
+    )
+
+def pcm_rms(pcm: bytes) -> float:
+    """Root-mean-square level of 16-bit PCM samples"""
+    # Ignore a trailing partial sample if the recorder was cut off mid-write
+    data = memoryview(pcm)[:len(pcm) // 2 * 2]
+    if np is not None:
+        samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        return float(np.sqrt(np.mean(samples * samples)))
+    
+    samples = array.array('h')
+    samples.frombytes(data)
+    return math.sqrt(sum(sample * sample for sample in samples) / len(samples))
+
+def free_port(host: str) -> int:
+    """Ask the kernel for a currently unused TCP port on host"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+        probe.bind((host, 0))
+        return probe.getsockname()[1]
+
+def pin_to_whisper_cpus(pid: int):
+    """Restrict a freshly spawned whisper process to WHISPER_CPUS"""
+    # Set before whisper loads the model and starts its compute threads,
+    # which then inherit the mask
+    try:
+        os.sched_setaffinity(pid, WHISPER_CPUS)
+    except OSError:
+        pass
 
 class PushToTalkDaemon:
     def __init__(self):
         self.recording = False
         self.recording_process = None
-        self.temp_audio = None
+        self.reader_thread = None
+        self.recording_lock = threading.Lock()
+        self.audio_buffer = bytearray()
         self.recording_key_pressed = False
+        self.held_modifiers = set()
+        self.whisper_server = None
+        self.whisper_server_port = None
+        
+        # Resolve output tools once instead of forking `which` per utterance
+        self.ydotool = shutil.which('ydotool')
+        self.xdotool = shutil.which('xdotool')
+        self.wl_copy = shutil.which('wl-copy')
+        self.xclip = shutil.which('xclip')
+        self.ydotool_type_args = self.probe_ydotool_type_args()
         
         # Ensure recordings directory exists
         RECORDINGS_DIR.mkdir(parents=True, exist_ok=True)
+        self.cache = self.open_transcription_cache()
         
         # Find keyboard device
         self.keyboard = self.find_keyboard()
@@ -64,28 +211,69 @@ class PushToTalkDaemon:
             sys.exit(1)
         
         print(f"Using keyboard: {self.keyboard.name}")
+        print(f"Using model: {MODEL_PATH.name}")
+        
+        # Keep the model loaded across utterances instead of cold-starting whisper-cli
+        self.whisper_server = self.start_whisper_server()
+        
         print("")
         print("🎤 Push-to-Talk ready!")
-        print("📌 Hold Right Alt (AltGr) to record")
+        print(f"📌 Hold {RECORD_KEY_LABEL} to record")
         print("📝 Release to transcribe and type")
         print("❌ Press Ctrl+C to exit")
     
     def find_keyboard(self) -> Optional[InputDevice]:
+        """Reuse the cached keyboard if it is still present, otherwise scan all devices"""
+        keyboard = self.load_cached_keyboard()
+        if keyboard:
+            print(f"  Cached keyboard (delete {KEYBOARD_CACHE_PATH} to choose again)")
+            return keyboard
+        
+        keyboard = self.scan_keyboards()
+        # Only remember physical keyboards, so a virtual fallback is not sticky
+        if keyboard and 'virtual' not in keyboard.name.lower():
+            self.cache_keyboard(keyboard)
+        return keyboard
+    
+    def load_cached_keyboard(self) -> Optional[InputDevice]:
+        """Open the keyboard chosen on a previous run, if it is still the same device"""
+        try:
+            path, name = KEYBOARD_CACHE_PATH.read_text().split('\n', 1)
+            device = InputDevice(path)
+        except (OSError, ValueError):
+            return None
+        
+        # Event node numbers get reassigned on hotplug/reboot, so check it's the same keyboard
+        if device.name != name.strip() or ecodes.KEY_A not in device.capabilities().get(ecodes.EV_KEY, []):
+            device.close()
+            return None
+        return device
+    
+    def cache_keyboard(self, keyboard: InputDevice):
+        """Remember the chosen keyboard so the next start skips the device scan"""
+        # As root we would leave root-owned files in the user's cache dir
+        if os.geteuid() == 0:
+            return
+        
+        try:
+            KEYBOARD_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            KEYBOARD_CACHE_PATH.write_text(f"{keyboard.path}\n{keyboard.name}\n")
+        except OSError:
+            pass
+    
+    def scan_keyboards(self) -> Optional[InputDevice]:
         """Find the first physical keyboard device (skip virtual devices)"""
         devices = [evdev.InputDevice(path) for path in evdev.list_devices()]
         keyboards = []
         
-        for i, device in enumerate(devices):
-            capabilities = device.capabilities(verbose=True)
-            # Check if device has KEY events and common keyboard keys
-            if ('EV_KEY', 1) in capabilities:
-                keys = capabilities[('EV_KEY', 1)]
-                # Check for alphabetic keys to identify keyboard
-                if any('KEY_A' in str(key) for key in keys):
-                    # Skip virtual devices like ydotoold
-                    if 'virtual' not in device.name.lower():
-                        keyboards.append(device)
-                        print(f"  [{len(keyboards)}] {device.name}")
+        for device in devices:
+            # Check for alphabetic keys among the KEY events to identify keyboard
+            keys = device.capabilities().get(ecodes.EV_KEY, [])
+            if ecodes.KEY_A in keys:
+                # Skip virtual devices like ydotoold
+                if 'virtual' not in device.name.lower():
+                    keyboards.append(device)
+                    print(f"  [{len(keyboards)}] {device.name}")
         
         # If we found keyboards, ask which one to use
         if keyboards:
@@ -107,11 +295,8 @@ class PushToTalkDaemon:
         # If no physical keyboards found, try any keyboard (but warn)
         print("Warning: No physical keyboard found, trying virtual devices...")
         for device in devices:
-            capabilities = device.capabilities(verbose=True)
-            if ('EV_KEY', 1) in capabilities:
-                keys = capabilities[('EV_KEY', 1)]
-                if any('KEY_A' in str(key) for key in keys):
-                    return device
+            if ecodes.KEY_A in device.capabilities().get(ecodes.EV_KEY, []):
+                return device
         
         return None
     
@@ -121,32 +306,26 @@ class PushToTalkDaemon:
             return
         
         self.recording = True
-        self.temp_audio = tempfile.NamedTemporaryFile(
-            suffix='.wav', 
-            dir=RECORDINGS_DIR, 
-            delete=False
-        )
+        self.audio_buffer = bytearray()
         
-        print("\n🎤 Recording... (release Right Alt to stop)")
+        print(f"\n🎤 Recording... (release {RECORD_KEY_LABEL} to stop)")
         
         # Try multiple recording methods in order of preference
+        # Every method writes raw 16kHz mono s16le PCM to stdout
         if os.geteuid() == 0:
             # Running as root - prefer FFmpeg (with corrected syntax)
             recording_methods = [
                 {
                     'name': 'FFmpeg (PulseAudio)',
-                    'cmd': ['ffmpeg', '-f', 'pulse', '-ac', '1', '-ar', '16000', '-i', 'default', '-y', self.temp_audio.name],
-                    'quiet': True
+                    'cmd': ['ffmpeg', '-nostdin', '-loglevel', 'quiet', '-f', 'pulse', '-i', 'default', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-']
                 },
                 {
                     'name': 'FFmpeg (ALSA hw:1,0)',
-                    'cmd': ['ffmpeg', '-f', 'alsa', '-ac', '1', '-ar', '16000', '-i', 'hw:1,0', '-y', self.temp_audio.name],
-                    'quiet': True
+                    'cmd': ['ffmpeg', '-nostdin', '-loglevel', 'quiet', '-f', 'alsa', '-i', 'hw:1,0', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-']
                 },
                 {
                     'name': 'FFmpeg (ALSA default)',
-                    'cmd': ['ffmpeg', '-f', 'alsa', '-ac', '1', '-ar', '16000', '-i', 'default', '-y', self.temp_audio.name],
-                    'quiet': True
+                    'cmd': ['ffmpeg', '-nostdin', '-loglevel', 'quiet', '-f', 'alsa', '-i', 'default', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-']
                 }
             ]
         else:
@@ -154,182 +333,342 @@ class PushToTalkDaemon:
             recording_methods = [
                 {
                     'name': 'pw-record (PipeWire)',
-                    'cmd': ['pw-record', '--channels=1', '--rate=48000', '--format=s16le', self.temp_audio.name],
-                    'quiet': False
+                    'cmd': ['pw-record', '--raw', '--channels=1', f'--rate={SAMPLE_RATE}', '--format=s16', '-']
                 },
                 {
                     'name': 'parecord (PulseAudio/PipeWire)',
-                    'cmd': ['parecord', '--channels=1', '--rate=48000', '--format=s16le', self.temp_audio.name],
-                    'quiet': False
+                    'cmd': ['parecord', '--raw', '--channels=1', f'--rate={SAMPLE_RATE}', '--format=s16le']
                 },
                 {
                     'name': 'FFmpeg (PulseAudio/PipeWire)',
-                    'cmd': ['ffmpeg', '-f', 'pulse', '-ac', '1', '-ar', '48000', '-i', 'default', '-y', self.temp_audio.name],
-                    'quiet': True
+                    'cmd': ['ffmpeg', '-nostdin', '-loglevel', 'quiet', '-f', 'pulse', '-i', 'default', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-']
                 },
                 {
                     'name': 'FFmpeg (ALSA hw:1,0)', 
-                    'cmd': ['ffmpeg', '-f', 'alsa', '-ac', '1', '-ar', '16000', '-i', 'hw:1,0', '-y', self.temp_audio.name],
-                    'quiet': True
+                    'cmd': ['ffmpeg', '-nostdin', '-loglevel', 'quiet', '-f', 'alsa', '-i', 'hw:1,0', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-']
                 },
                 {
                     'name': 'FFmpeg (ALSA default)', 
-                    'cmd': ['ffmpeg', '-f', 'alsa', '-ac', '1', '-ar', '16000', '-i', 'default', '-y', self.temp_audio.name],
-                    'quiet': True
+                    'cmd': ['ffmpeg', '-nostdin', '-loglevel', 'quiet', '-f', 'alsa', '-i', 'default', '-ac', '1', '-ar', str(SAMPLE_RATE), '-f', 's16le', '-']
                 },
                 {
-                    'name': 'arecord (ALSA hw:1,0)',
-                    'cmd': ['arecord', '-D', 'hw:1,0', '-f', 'S16_LE', '-r', '48000', '-c', '1', '-q', self.temp_audio.name],
-                    'quiet': True
+                    'name': 'arecord (ALSA plughw:1,0)',
+                    'cmd': ['arecord', '-D', 'plughw:1,0', '-t', 'raw', '-f', 'S16_LE', '-r', str(SAMPLE_RATE), '-c', '1', '-q', '-']
                 },
                 {
                     'name': 'arecord (ALSA default)',
-                    'cmd': ['arecord', '-D', 'default', '-f', 'S16_LE', '-r', '48000', '-c', '1', '-q', self.temp_audio.name],
-                    'quiet': True
+                    'cmd': ['arecord', '-D', 'default', '-t', 'raw', '-f', 'S16_LE', '-r', str(SAMPLE_RATE), '-c', '1', '-q', '-']
                 }
             ]
         
         self.recording_process = None
         
+        # Capture in the background so the key press returns immediately
+        self.reader_thread = threading.Thread(
+            target=self.capture_audio,
+            args=(recording_methods,),
+            daemon=True
+        )
+        self.reader_thread.start()
+    
+    def capture_audio(self, recording_methods: list):
+        """Run recorders in order until one delivers audio, buffering its PCM in memory"""
         for method in recording_methods:
-            try:
-                # For FFmpeg, add quiet flags
-                cmd = method['cmd'].copy()
-                if method['quiet'] and 'ffmpeg' in cmd[0]:
-                    cmd.extend(['-loglevel', 'quiet'])
-                
-                self.recording_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.DEVNULL if method['quiet'] else subprocess.PIPE,
-                    stderr=subprocess.DEVNULL if method['quiet'] else subprocess.PIPE
-                )
-                
-                # Give it a moment to start
-                time.sleep(0.2)
-                
-                # Check if it started successfully
-                if self.recording_process.poll() is None:
-                    print(f"✓ Recording with {method['name']}")
-                    break
-                else:
-                    # Process failed, try next method
+            with self.recording_lock:
+                if not self.recording:
+                    return
+                try:
+                    process = subprocess.Popen(
+                        method['cmd'],
+                        stdin=subprocess.DEVNULL,
+                        stdout=subprocess.PIPE,
+                        stderr=subprocess.DEVNULL
+                    )
+                except FileNotFoundError:
+                    # Command not found, try next method
                     continue
-                    
-            except FileNotFoundError:
-                # Command not found, try next method
-                continue
+                self.recording_process = process
+            
+            self.read_audio(process.stdout)
+            process.stdout.close()
+            
+            if self.audio_buffer:
+                print(f"✓ Recorded with {method['name']}")
+                return
+            
+            # Key released before this recorder delivered anything
+            if not self.recording:
+                return
+            
+            # Recorder exited before delivering any audio, try next method
+            process.wait()
         
-        # If no method worked
-        if not self.recording_process or self.recording_process.poll() is not None:
-            print("❌ All recording methods failed")
-            print("Try: sudo dnf install sox pulseaudio-utils")
+        print("❌ All recording methods failed")
+        print("Try: sudo dnf install sox pulseaudio-utils")
+        with self.recording_lock:
             self.recording = False
             self.recording_process = None
     
+    def read_audio(self, stream):
+        """Append raw PCM from the recorder to the in-memory buffer until EOF"""
+        # Read whatever the pipe holds straight from the fd, one syscall per chunk
+        fd = stream.fileno()
+        for chunk in iter(lambda: os.read(fd, READ_CHUNK_SIZE), b''):
+            self.audio_buffer.extend(chunk)
+    
     def stop_recording_and_transcribe(self):
         """Stop recording and transcribe the audio"""
-        if not self.recording or not self.recording_process:
-            return
-        
-        self.recording = False
+        with self.recording_lock:
+            if not self.recording:
+                return
+            self.recording = False
+            process = self.recording_process
         
-        # Stop recording
-        self.recording_process.terminate()
-        self.recording_process.communicate(timeout=1)
+        # Stop recording and let the reader drain the pipe; transcription can
+        # start as soon as the pipe hits EOF, so reap the recorder in the background.
+        # Recorders flush and exit on SIGINT within a few ms
+        if process:
+            process.send_signal(signal.SIGINT)
+        self.reader_thread.join(timeout=RECORDER_STOP_TIMEOUT)
+        if process:
+            if self.reader_thread.is_alive():
+                process.kill()
+                self.reader_thread.join()
+            threading.Thread(target=process.wait, daemon=True).start()
         
         print("⏹️  Stopped recording")
         
-        # Check file size to ensure we have audio
-        if self.temp_audio:
-            file_size = os.path.getsize(self.temp_audio.name)
-            if file_size < 1000:
-                print("❌ No audio recorded - speak louder or check microphone")
-                return
+        # Check buffer size to ensure we have audio
+        pcm = self.audio_buffer
+        self.audio_buffer = bytearray()
+        if len(pcm) < 1000:
+            print("❌ No audio recorded - speak louder or check microphone")
+            return
+        
+        # Skip whisper entirely for silent clips (accidental key taps)
+        if pcm_rms(pcm) < SILENCE_RMS_THRESHOLD:
+            print("❌ No speech detected")
+            return
         
         print("🔄 Transcribing...")
         
-        # Check if we need to resample (Whisper expects 16kHz)
-        # If we recorded at 48kHz, resample first
-        whisper_audio_file = self.temp_audio.name
-        if os.path.getsize(self.temp_audio.name) > 1000:
-            # Try to resample with ffmpeg if needed
-            try:
-                import subprocess
-                import tempfile
-                
-                # Create temp file for resampled audio
-                resampled_audio = tempfile.NamedTemporaryFile(suffix='.wav', dir=RECORDINGS_DIR, delete=False)
-                
-                # Resample to 16kHz for Whisper
-                resample_cmd = [
-                    'ffmpeg', '-i', self.temp_audio.name, 
-                    '-ar', '16000', '-ac', '1', '-y', 
-                    resampled_audio.name
-                ]
+        try:
+            # Identical clips (e.g. repeated short commands) skip whisper entirely
+            audio_hash = hashlib.blake2b(pcm, digest_size=16).digest()
+            transcription = self.lookup_transcription(audio_hash)
+            if transcription is None:
+                transcription = self.transcribe(pcm)
+            
+            if transcription:
+                print(f"✅ Transcribed: {transcription}")
+                self.type_text(transcription)
+                # Cache only after typing, so the commit stays off the release->typed path
+                self.store_transcription(audio_hash, transcription)
+            else:
+                print("❌ No speech detected")
                 
-                result = subprocess.run(resample_cmd, capture_output=True, timeout=5)
-                if result.returncode == 0 and os.path.getsize(resampled_audio.name) > 100:
-                    whisper_audio_file = resampled_audio.name
-                    print("✓ Resampled audio for Whisper")
-                else:
-                    # Use original file if resampling failed
-                    os.unlink(resampled_audio.name)
-                    
-            except Exception:
-                # If resampling fails, use original file
-                pass
+        except (subprocess.TimeoutExpired, TimeoutError):
+            print("❌ Transcription timeout")
+        except Exception as e:
+            print(f"❌ Error: {e}")
+    
+    def transcribe(self, pcm: bytes) -> str:
+        """Transcribe raw PCM with whisper-server, or whisper-cli as fallback"""
+        if self.whisper_server and self.whisper_server.poll() is None:
+            transcription = self.transcribe_with_server(pcm)
+        else:
+            transcription = self.transcribe_with_cli(pcm)
+        
+        # Clean up the transcription
+        transcription = transcription.replace('<|endoftext|>', '')
         
-        # Transcribe with whisper
+        # Remove all ANSI escape sequences (color codes, etc.)
+        return ANSI_ESCAPE_RE.sub('', transcription).strip()
+    
+    def open_transcription_cache(self) -> Optional[sqlite3.Connection]:
+        """Open the transcription cache, keyed by a hash of the recorded PCM"""
+        if not TRANSCRIPTION_CACHE_ENABLED:
+            return None
+        
+        try:
+            # The cache holds dictated text in plaintext, so keep it private to the user
+            os.close(os.open(TRANSCRIPTION_CACHE_PATH, os.O_CREAT | os.O_RDWR, 0o600))
+            os.chmod(TRANSCRIPTION_CACHE_PATH, 0o600)
+            cache = sqlite3.connect(TRANSCRIPTION_CACHE_PATH)
+            cache.execute(
+                'CREATE TABLE IF NOT EXISTS tx '
+                '(hash BLOB PRIMARY KEY, text TEXT NOT NULL, last_used REAL NOT NULL)'
+            )
+            return cache
+        except (sqlite3.Error, OSError) as e:
+            print(f"⚠️  Transcription cache disabled: {e}")
+            return None
+    
+    def lookup_transcription(self, audio_hash: bytes) -> Optional[str]:
+        """Return a cached transcription, if any"""
+        if not self.cache:
+            return None
+        
+        try:
+            row = self.cache.execute('SELECT text FROM tx WHERE hash = ?', (audio_hash,)).fetchone()
+        except sqlite3.Error as e:
+            self.disable_transcription_cache(e)
+            return None
+        return row[0] if row else None
+    
+    def store_transcription(self, audio_hash: bytes, text: str):
+        """Cache a transcription (refreshing its last use), evicting the least recently used entries"""
+        if not self.cache:
+            return
+        
+        try:
+            with self.cache:
+                self.cache.execute(
+                    'INSERT OR REPLACE INTO tx (hash, text, last_used) VALUES (?, ?, ?)',
+                    (audio_hash, text, time.time())
+                )
+                self.cache.execute(
+                    'DELETE FROM tx WHERE hash IN '
+                    '(SELECT hash FROM tx ORDER BY last_used DESC LIMIT -1 OFFSET ?)',
+                    (TRANSCRIPTION_CACHE_SIZE,)
+                )
+        except sqlite3.Error as e:
+            # e.g. a read-only database left behind by a sudo run
+            self.disable_transcription_cache(e)
+    
+    def disable_transcription_cache(self, error: sqlite3.Error):
+        """Stop using the cache after an error so it can never drop a dictation"""
+        print(f"⚠️  Transcription cache disabled: {error}")
+        self.cache.close()
+        self.cache = None
+    
+    def start_whisper_server(self) -> Optional[subprocess.Popen]:
+        """Launch whisper-server so the model stays loaded between utterances"""
+        if not WHISPER_SERVER_BIN.exists():
+            print(f"⚠️  whisper-server not found at {WHISPER_SERVER_BIN}")
+            print("   Falling back to whisper-cli (model reloads on every utterance)")
+            return None
+        
+        # A fresh port per run, so an orphaned server from a crashed run (or any
+        # other service) can never answer the readiness probe in its place
+        self.whisper_server_port = free_port(WHISPER_SERVER_HOST)
+        
+        cmd = [
+            str(WHISPER_SERVER_BIN),
+            '-m', str(MODEL_PATH),
+            '--host', WHISPER_SERVER_HOST,
+            '--port', str(self.whisper_server_port),
+            '--no-timestamps',
+            '-l', 'en',
+            '-t', str(WHISPER_THREADS)
+        ]
+        
+        print("⏳ Loading Whisper model into whisper-server...")
+        server = subprocess.Popen(
+            cmd,
+            env=WHISPER_ENV,
+            close_fds=False,  # keeps Popen on the posix_spawn fast path
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        pin_to_whisper_cpus(server.pid)
+        
+        # The server only starts listening once the model is loaded
+        deadline = time.monotonic() + WHISPER_SERVER_STARTUP_TIMEOUT
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                break
+            try:
+                with socket.create_connection((WHISPER_SERVER_HOST, self.whisper_server_port), timeout=0.5):
+                    pass
+            except OSError:
+                time.sleep(0.1)
+                continue
+            
+            # Make sure it is our child that answered, not something that grabbed the port meanwhile
+            if server.poll() is None:
+                print("✓ whisper-server ready")
+                return server
+            break
+        
+        print("⚠️  whisper-server failed to start, falling back to whisper-cli")
+        if server.poll() is None:
+            server.terminate()
+            server.wait()
+        return None
+    
+    def transcribe_with_server(self, pcm: bytes) -> str:
+        """Transcribe raw PCM with the persistent whisper-server"""
+        # whisper-server only parses WAV, so send the header and the PCM as
+        # separate chunks rather than copying the clip into one buffer
+        boundary = os.urandom(16).hex()
+        body = (
+            f'--{boundary}\r\n'
+            'Content-Disposition: form-data; name="file"; filename="audio.wav"\r\n'
+            'Content-Type: audio/wav\r\n\r\n'.encode() + wav_header(len(pcm)),
+            pcm,
+            f'\r\n--{boundary}\r\n'
+            'Content-Disposition: form-data; name="response_format"\r\n\r\n'
+            f'json\r\n--{boundary}--\r\n'.encode()
+        )
+        
+        connection = http.client.HTTPConnection(WHISPER_SERVER_HOST, self.whisper_server_port, timeout=10)
+        try:
+            connection.request(
+                'POST', '/inference',
+                body=body,
+                headers={
+                    'Content-Type': f'multipart/form-data; boundary={boundary}',
+                    # An explicit length keeps http.client from chunk-encoding the parts
+                    'Content-Length': str(sum(len(part) for part in body))
+                }
+            )
+            response = connection.getresponse()
+            payload = response.read()
+        finally:
+            connection.close()
+        
+        if response.status != 200:
+            raise RuntimeError(f"whisper-server returned HTTP {response.status}")
+        return json.loads(payload).get('text', '')
+    
+    def transcribe_with_cli(self, pcm: bytes) -> str:
+        """Transcribe raw PCM with a one-shot whisper-cli run fed through stdin"""
         cmd = [
             str(WHISPER_BIN),
             '-m', str(MODEL_PATH),
-            '-f', whisper_audio_file,
+            '-f', '-',
             '--no-timestamps',
             '--print-colors', 'false',
             '--print-special', 'false',
             '--print-progress', 'false',
             '-l', 'en',
-            '-t', '4'
+            '-t', str(WHISPER_THREADS)
         ]
         
+        # An absolute argv[0] and close_fds=False let Popen use posix_spawn
+        # instead of fork(); our own fds are non-inheritable anyway (PEP 446)
+        process = subprocess.Popen(
+            cmd,
+            env=WHISPER_ENV,
+            close_fds=False,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        pin_to_whisper_cpus(process.pid)
+        
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=10
-            )
-            
-            # Extract transcription from output
-            lines = result.stdout.strip().split('\n')
-            if lines:
-                # Get last non-empty line and clean it
-                transcription = lines[-1].strip()
-                transcription = transcription.replace('<|endoftext|>', '').strip()
-                
-                # Remove all ANSI escape sequences (color codes, etc.)
-                import re
-                transcription = re.sub(r'\x1b\[[0-9;]*m', '', transcription)
-                transcription = re.sub(r'\x1b\[[0-9]*[A-Za-z]', '', transcription)
-                transcription = transcription.strip()
-                
-                if transcription:
-                    print(f"✅ Transcribed: {transcription}")
-                    self.type_text(transcription)
-                else:
-                    print("❌ No speech detected")
-            else:
-                print("❌ Transcription failed")
-                
+            stdout, _ = process.communicate(wav_header(len(pcm)) + pcm, timeout=10)
         except subprocess.TimeoutExpired:
-            print("❌ Transcription timeout")
-        except Exception as e:
-            print(f"❌ Error: {e}")
-        finally:
-            # Clean up temp file
-            if self.temp_audio and os.path.exists(self.temp_audio.name):
-                os.unlink(self.temp_audio.name)
-            self.temp_audio = None
+            process.kill()
+            process.communicate()
+            raise
+        
+        # Transcription is the last line of output
+        lines = stdout.decode('utf-8', errors='replace').strip().split('\n')
+        return lines[-1]
     
     def type_text(self, text: str):
         """Type the transcribed text using ydotool or xdotool"""
@@ -344,14 +683,39 @@ class PushToTalkDaemon:
         # Last resort: copy to clipboard
         self.copy_to_clipboard(text)
     
+    def probe_ydotool_type_args(self) -> list:
+        """Pick the ydotool type flags that remove all per-character throttling"""
+        args = ['--key-delay', '0']
+        if not self.ydotool:
+            return args
+        
+        # ydotool 1.x also holds each key for --key-hold (20ms by default); 0.1.x has no such flag
+        try:
+            result = subprocess.run(
+                [self.ydotool, 'type', '--help'],
+                capture_output=True,
+                text=True,
+                timeout=2
+            )
+            if 'key-hold' in result.stdout + result.stderr:
+                args += ['--key-hold', '0']
+        except (subprocess.SubprocessError, OSError):
+            pass
+        return args
+    
     def try_ydotool(self, text: str) -> bool:
         """Try to type with ydotool (Wayland)"""
+        if not self.ydotool:
+            return False
+        
         try:
-            # Check if ydotool is available
-            subprocess.run(['which', 'ydotool'], check=True, capture_output=True)
-            
-            # Type the text
-            subprocess.run(['ydotool', 'type', text], check=True)
+            # Stream the text through stdin (no ARG_MAX limit) without per-key delay
+            subprocess.run(
+                [self.ydotool, 'type', *self.ydotool_type_args, '--file', '-'],
+                input=text,
+                text=True,
+                check=True
+            )
             print("📝 Text typed (ydotool)")
             return True
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -359,13 +723,12 @@ class PushToTalkDaemon:
     
     def try_xdotool(self, text: str) -> bool:
         """Try to type with xdotool (X11)"""
+        if not self.xdotool:
+            return False
+        
         try:
-            # Check if xdotool is available
-            subprocess.run(['which', 'xdotool'], check=True, capture_output=True)
-            
-            # Type the text
-            time.sleep(0.5)  # Give time to focus
-            subprocess.run(['xdotool', 'type', text], check=True)
+            # Type the text without per-key delay
+            subprocess.run([self.xdotool, 'type', '--delay', '0', '--', text], check=True)
             print("📝 Text typed (xdotool)")
             return True
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -373,53 +736,98 @@ class PushToTalkDaemon:
     
     def copy_to_clipboard(self, text: str):
         """Copy text to clipboard as fallback"""
-        try:
-            # Try wl-copy for Wayland
-            subprocess.run(
-                ['wl-copy'],
-                input=text,
-                text=True,
-                check=True,
-                capture_output=True
-            )
-            print("📋 Text copied to clipboard (wl-copy)")
-        except (subprocess.CalledProcessError, FileNotFoundError):
+        # Try wl-copy for Wayland
+        if self.wl_copy:
+            try:
+                subprocess.run(
+                    [self.wl_copy],
+                    input=text,
+                    text=True,
+                    check=True,
+                    capture_output=True
+                )
+                print("📋 Text copied to clipboard (wl-copy)")
+                return
+            except (subprocess.CalledProcessError, FileNotFoundError):
+                pass
+        
+        # Try xclip for X11
+        if self.xclip:
             try:
-                # Try xclip for X11
                 subprocess.run(
-                    ['xclip', '-selection', 'clipboard'],
+                    [self.xclip, '-selection', 'clipboard'],
                     input=text,
                     text=True,
                     check=True
                 )
                 print("📋 Text copied to clipboard (xclip)")
+                return
             except (subprocess.CalledProcessError, FileNotFoundError):
-                print(f"⚠️  Could not type or copy. Text: {text}")
+                pass
+        
+        print(f"⚠️  Could not type or copy. Text: {text}")
+    
+    def handle_key(self, code: int, value: int):
+        """Track the push-to-talk key (and chord modifiers) with plain integer compares"""
+        if code in MODIFIER_KEYS:
+            if value == 1:  # Key down
+                self.held_modifiers.add(code)
+            elif value == 0:  # Key up
+                self.held_modifiers.discard(code)
+                # Releasing any part of the chord ends the recording
+                if self.recording_key_pressed:
+                    self.recording_key_pressed = False
+                    self.stop_recording_and_transcribe()
+        elif code == RECORD_KEY:
+            if value == 1:  # Key down
+                if not self.recording_key_pressed and len(self.held_modifiers) == len(MODIFIER_KEYS):
+                    self.recording_key_pressed = True
+                    self.start_recording()
+            elif value == 0:  # Key up
+                if self.recording_key_pressed:
+                    self.recording_key_pressed = False
+                    self.stop_recording_and_transcribe()
     
     def run(self):
         """Main event loop"""
+        # Keep key handling on its own core, away from whisper's threads.
+        # Capture threads and recorders started from here inherit this mask
+        os.sched_setaffinity(0, {EVENT_LOOP_CPU})
+        
+        # Route Ctrl+C/SIGTERM through a pipe so the selector wakes up to exit
+        wakeup_read, wakeup_write = os.pipe()
+        os.set_blocking(wakeup_write, False)
+        signal.set_wakeup_fd(wakeup_write)
+        signal.signal(signal.SIGINT, lambda signum, frame: None)
+        signal.signal(signal.SIGTERM, lambda signum, frame: None)
+        
+        selector = selectors.DefaultSelector()
+        selector.register(self.keyboard.fd, selectors.EVENT_READ)
+        selector.register(wakeup_read, selectors.EVENT_READ)
+        
         try:
-            for event in self.keyboard.read_loop():
-                if event.type == ecodes.EV_KEY:
-                    key_event = categorize(event)
-                    
-                    # Track Right Alt key state
-                    # keycode from categorize is a string like 'KEY_RIGHTALT'
-                    if 'KEY_RIGHTALT' in str(key_event.keycode):
-                        if key_event.keystate == 1:  # Key down
-                            if not self.recording_key_pressed:
-                                self.recording_key_pressed = True
-                                self.start_recording()
-                        elif key_event.keystate == 0:  # Key up
-                            if self.recording_key_pressed:
-                                self.recording_key_pressed = False
-                                self.stop_recording_and_transcribe()
+            running = True
+            while running:
+                for key, _ in selector.select():
+                    if key.fd == wakeup_read:
+                        running = False
+                        break
                     
-        except KeyboardInterrupt:
+                    # Drain every queued event (autorepeat, chords) in one pass
+                    for event in self.keyboard.read():
+                        if event.type == ecodes.EV_KEY:
+                            self.handle_key(event.code, event.value)
+            
             print("\n👋 Exiting push-to-talk daemon")
+        finally:
+            # Also runs on errors (e.g. keyboard unplugged), so the server
+            # never outlives us holding the model and the port
             if self.recording_process:
                 self.recording_process.terminate()
-            sys.exit(0)
+            if self.whisper_server:
+                self.whisper_server.terminate()
+                self.whisper_server.wait()
+        sys.exit(0)
 
 def check_requirements():
     """Check if all requirements are met"""
@@ -456,9 +864,7 @@ def check_requirements():
         sys.exit(1)
     
     # Check for parecord
-    try:
-        subprocess.run(['which', 'parecord'], check=True, capture_output=True)
-    except subprocess.CalledProcessError:
+    if not shutil.which('parecord'):
         print("Error: parecord not found. Install with: sudo dnf install pulseaudio-utils")
         sys.exit(1)
 
@@ -7,11 +7,16 @@
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 PROJECT_ROOT="$(dirname "$(dirname "$SCRIPT_DIR")")"
 WHISPER_BIN="$HOME/workspace/whisper.cpp/build/bin/whisper-cli"
-MODEL_PATH="$PROJECT_ROOT/data/models/ggml-base.en.bin"
+MODEL_PATH="$PROJECT_ROOT/data/models/ggml-base.en-q5_1.bin"
+[ -f "$MODEL_PATH" ] || MODEL_PATH="$PROJECT_ROOT/data/models/ggml-base.en.bin"
+WHISPER_THREADS=$(( $(nproc) > 1 ? $(nproc) - 1 : 1 ))  # all cores but one
 RECORDINGS_DIR="$PROJECT_ROOT/data/recordings"
 LOCK_FILE="/tmp/voice_dictation.lock"
 PID_FILE="/tmp/voice_dictation.pid"
-AUDIO_FILE="/tmp/voice_dictation.wav"
+# Keep the short-lived clip in RAM (tmpfs) when available
+AUDIO_DIR="/dev/shm"
+[ -d "$AUDIO_DIR" ] || AUDIO_DIR="/tmp"
+AUDIO_FILE="$AUDIO_DIR/voice_dictation.wav"
 
 # Check if already recording
 if [ -f "$LOCK_FILE" ]; then
@@ -44,7 +49,7 @@ if [ -f "$LOCK_FILE" ]; then
             --print-special false \
             --print-progress false \
             -l en \
-            -t 4 \
+            -t "$WHISPER_THREADS" \
             2>/dev/null | tail -n 1 | sed 's/\x1b\[[0-9;]*m//g; s/<|endoftext|>//g; s/^[[:space:]]*//; s/[[:space:]]*$//')
         
         if [ -n "$OUTPUT" ]; then